@@ -4,32 +4,36 @@ import os
 import fnmatch
 import argparse
 import subprocess
-import clr
+import collections
 import colorama
 
-clr.AddReference('xltrail-core')
-from xltrail.core import Workbook
-
 
 VERSION = '0.0.0'
 GIT_COMMIT = 'dev'
 PYTHON_VERSION = f'{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}'
 FILE_EXTENSIONS = ['xls', 'xlt', 'xla', 'xlam', 'xlsx', 'xlsm', 'xlsb', 'xltx', 'xltm']
-GIT_ATTRIBUTES_DIFFER = ['*.' + file_ext + ' diff=xl' for file_ext in FILE_EXTENSIONS]
-GIT_ATTRIBUTES_MERGER = ['*.' + file_ext + ' merge=xl' for file_ext in FILE_EXTENSIONS]
-GIT_IGNORE = ['~$*.' + file_ext for file_ext in FILE_EXTENSIONS]
+GIT_ATTRIBUTES_DIFFER = frozenset('*.' + file_ext + ' diff=xl' for file_ext in FILE_EXTENSIONS)
+GIT_ATTRIBUTES_MERGER = frozenset('*.' + file_ext + ' merge=xl' for file_ext in FILE_EXTENSIONS)
+GIT_IGNORE = frozenset('~$*.' + file_ext for file_ext in FILE_EXTENSIONS)
+FILE_BUFFER_SIZE = 128 * 1024
 
 
 def is_frozen():
     return getattr(sys, 'frozen', False)
 
 
-def is_git_repository(path):
-    cmd = subprocess.run(['git', 'rev-parse'], cwd=path, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-                         universal_newlines=True)
-    if not cmd.stderr.split('\n')[0]:
-        return True
-    return False
+GitRepository = collections.namedtuple('GitRepository', ['is_repo', 'toplevel'])
+
+
+def get_git_repository(path):
+    # single `git rev-parse` call answering everything we need to know about the repository
+    cmd = subprocess.run(['git', 'rev-parse', '--is-inside-work-tree', '--show-toplevel'], cwd=path,
+                         stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    # git prints paths as UTF-8 (with forward slashes on Windows), independent of the console code page
+    lines = cmd.stdout.decode('utf-8', 'surrogateescape').split('\n')
+    if cmd.returncode != 0 or len(lines) < 2 or lines[0] != 'true':
+        return GitRepository(False, None)
+    return GitRepository(True, os.path.normpath(lines[1]))
 
 
 class Installer:
@@ -53,12 +57,20 @@ class Installer:
         if mode == 'local' and not path:
             raise ValueError('must specify repository path when installing locally')
 
-        if mode == 'local' and not is_git_repository(path):
-            raise ValueError('not a Git repository')
+        if mode == 'local':
+            repository = get_git_repository(path)
+            if not repository.is_repo:
+                raise ValueError('not a Git repository')
+            # .gitattributes and .gitignore live in the root of the working tree
+            path = repository.toplevel
 
         self.mode = mode
         self.path = path
 
+        # gitconfig entries and their origins (populated lazily by `get_config`)
+        self._config_cache = None
+        self._config_origins = None
+
         # global config dir (only set when running in `global` mode)
         self.git_global_config_dir = self.get_global_gitconfig_dir() if self.mode == 'global' else None
 
@@ -68,11 +80,11 @@ class Installer:
 
     def install(self):
         # 1. gitconfig: set-up diff.xl.command
-        self.execute(['diff.xl.command', self.GIT_XL_DIFF])
+        self.execute(['diff.xl.command', self.GIT_XL_DIFF], output=False)
 
         # 2. gitconfig: merge-driver
-        self.execute(['merge.xl.name', 'xl merge driver for Excel workbooks'])
-        self.execute(['merge.xl.driver', f'{self.GIT_XL_MERGE} %P %O %A %B'])
+        self.execute(['merge.xl.name', 'xl merge driver for Excel workbooks'], output=False)
+        self.execute(['merge.xl.driver', f'{self.GIT_XL_MERGE} %P %O %A %B'], output=False)
 
         # 3. set-up gitattributes (define custom differ and merger)
         self.update_git_file(path=self.git_attributes_path, keys=GIT_ATTRIBUTES_DIFFER, operation='SET')
@@ -84,15 +96,17 @@ class Installer:
         # 5. update gitconfig (only relevent when running in `global` mode)
         if self.mode == 'global':
             # set core.attributesfile
-            self.execute(['core.attributesfile', self.git_attributes_path])
+            self.execute(['core.attributesfile', self.git_attributes_path], output=False)
             # set core.excludesfile
-            self.execute(['core.excludesfile', self.git_ignore_path])
+            self.execute(['core.excludesfile', self.git_ignore_path], output=False)
 
     def uninstall(self):
-        # 1. gitconfig: remove diff.xl.command from gitconfig
-        keys = self.execute(['--list']).split('\n')
-        if [key for key in keys if key.startswith('diff.xl.command')]:
-            self.execute(['--remove-section', 'diff.xl'])
+        # 1. gitconfig: remove diff.xl and merge.xl from gitconfig
+        # (git exits with 128 if a section does not exist, which is fine here)
+        for section in ('diff.xl', 'merge.xl'):
+            returncode = self.execute(['--remove-section', section], output=False)
+            if returncode not in (0, 128):
+                raise RuntimeError(f'could not remove {section} from gitconfig')
 
         # 2. gitattributes: remove keys
         gitattributes_keys = self.update_git_file(path=self.git_attributes_path, keys=GIT_ATTRIBUTES_DIFFER,
@@ -102,43 +116,60 @@ class Installer:
         # when in global mode and gitattributes is empty, update gitconfig and delete gitattributes
         if not gitattributes_keys:
             if self.mode == 'global':
-                self.execute(['--unset', 'core.attributesfile'])
+                self.execute(['--unset', 'core.attributesfile'], output=False)
             self.delete_git_file(self.git_attributes_path)
 
         # 3. gitignore: remove keys
-        gitignore_keys = self.update_git_file(path=self.git_attributes_path, keys=GIT_IGNORE, operation='REMOVE')
+        gitignore_keys = self.update_git_file(path=self.git_ignore_path, keys=GIT_IGNORE, operation='REMOVE')
         # when in global mode and gitignore is empty, update gitconfig and delete gitignore
         if not gitignore_keys:
             if self.mode == 'global':
-                self.execute(['--unset', 'core.excludesfile'])
+                self.execute(['--unset', 'core.excludesfile'], output=False)
             self.delete_git_file(self.git_ignore_path)
     
-    def execute(self, args):
+    def execute(self, args, output=True):
         command = ['git', 'config']
         if self.mode == 'global':
             command.append('--global')
         command += args
-        return subprocess.run(command, cwd=self.path, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-                              universal_newlines=True).stdout
+        # only pipe stdout when the caller needs it; decode the raw bytes once
+        stdout = subprocess.PIPE if output else subprocess.DEVNULL
+        cmd = subprocess.run(command, cwd=self.path, stdout=stdout, stderr=subprocess.DEVNULL)
+        return cmd.stdout.decode('utf-8', 'replace') if output else cmd.returncode
+
+    def get_config(self):
+        # read the whole gitconfig once and serve subsequent lookups from memory
+        # returns (values, origins), both keyed by config name
+        # this requires Git 2.8+ (March 2016)
+        if self._config_cache is None:
+            self._config_cache = {}
+            self._config_origins = {}
+            # with -z every entry is emitted as `origin\0key\nvalue\0`
+            records = self.execute(['--list', '--show-origin', '-z']).split('\0')
+            for origin, entry in zip(records[0::2], records[1::2]):
+                key, _, value = entry.partition('\n')
+                self._config_cache[key] = value
+                self._config_origins[key] = origin
+        return self._config_cache, self._config_origins
 
     def get_global_gitconfig_dir(self):
         # put .gitattributes in same folder as global .gitconfig
-        # determine .gitconfig path
-        # this requires Git 2.8+ (March 2016)
-        f = self.execute(['--list', '--show-origin'])
-        p = self.execute(['--list'])
-
-        f = f.split('\n')[0]
-        p = p.split('\n')[0]
+        # determine .gitconfig path from the origin of any global entry
+        _, origins = self.get_config()
+        for origin in origins.values():
+            if origin.startswith('file:'):
+                return os.path.dirname(origin[len('file:'):])
 
-        return f[:f.index(p)][5:][:-11]
+        # no global .gitconfig yet: git creates it in the home directory
+        return os.path.expanduser('~')
 
     def get_git_attributes_path(self):
         if self.mode == 'local':
             return os.path.join(self.path, '.gitattributes')
 
         # check if core.attributesfile is configured
-        core_attributesfile = self.execute(['--get', 'core.attributesfile']).split('\n')[0]
+        config, _ = self.get_config()
+        core_attributesfile = config.get('core.attributesfile')
         if core_attributesfile:
             return os.path.expanduser(core_attributesfile)
 
@@ -150,7 +181,8 @@ class Installer:
             return os.path.join(self.path, '.gitignore')
 
         # check if core.excludesfile is configured
-        core_excludesfile = self.execute(['--get', 'core.excludesfile']).split('\n')[0]
+        config, _ = self.get_config()
+        core_excludesfile = config.get('core.excludesfile')
         if core_excludesfile:
             return os.path.expanduser(core_excludesfile)
 
@@ -159,28 +191,33 @@ class Installer:
 
     def update_git_file(self, path, keys, operation):
         assert operation in ('SET', 'REMOVE')
-        if os.path.exists(path):
-            with open(path, 'r') as f:
-                content = [line for line in f.read().split('\n') if line]
-        else:
+        # split the raw bytes on line breaks only; surrogateescape round-trips non-UTF-8 bytes unchanged
+        try:
+            with open(path, 'rb', buffering=FILE_BUFFER_SIZE) as f:
+                content = [line.decode('utf-8', 'surrogateescape') for line in f.read().splitlines() if line]
+        except FileNotFoundError:
             content = []
+        existing_content = content
 
         if operation == 'SET':
             # create union set: keys + existing content
-            content = sorted(list(set(content).union(set(keys))))
+            content = sorted({*content, *keys})
         else:
             # remove keys from content
             content = [line for line in content if line and line not in keys]
 
-        if content:
-            with open(path, 'w') as f:
-                f.writelines('\n'.join(content))
+        # only rewrite the file when something actually changed
+        if content and content != existing_content:
+            with open(path, 'wb', buffering=FILE_BUFFER_SIZE) as f:
+                f.write(('\n'.join(content) + '\n').encode('utf-8', 'surrogateescape'))
 
         return content
 
     def delete_git_file(self, path):
-        if os.path.exists(path):
+        try:
             os.remove(path)
+        except FileNotFoundError:
+            pass
 
 
 GIT_XL_VERSION = f'git-xl/{VERSION} (windows; Python {PYTHON_VERSION}); git {GIT_COMMIT}'
@@ -263,26 +300,26 @@ class CommandParser:
         print(GIT_XL_VERSION)
 
     def env(self):
-        current_path = os.getcwd()
+        repository = get_git_repository(os.getcwd())
+        if repository.is_repo:
+            local_paths = (repository.toplevel, os.path.join(repository.toplevel, '.gitignore'),
+                           os.path.join(repository.toplevel, '.gitattributes'))
+        else:
+            local_paths = ('', '', '')
         p = GIT_XL_VERSION + '\n\n'
-        p += 'LocalWorkingDir=' + (current_path if is_git_repository(current_path) else '') + '\n'
-        p += 'LocalGitIgnore=' + (
-            os.path.join(current_path, '.gitignore') if is_git_repository(current_path) else '') + '\n'
-        p += 'LocalGitAttributes=' + (
-            os.path.join(current_path, '.gitattributes') if is_git_repository(current_path) else '') + '\n'
+        p += 'LocalWorkingDir=%s\nLocalGitIgnore=%s\nLocalGitAttributes=%s\n' % local_paths
         print(p)
 
     def help(self, *args):
-        module = sys.modules[__name__]
         arg = args[0] if args else None
         if arg is None:
             print(HELP_GENERIC)
         else:
-            help_text = 'HELP_%s' % arg.upper().replace('-', '_')
-            if not hasattr(module, help_text):
+            help_text = globals().get('HELP_%s' % arg.upper().replace('-', '_'))
+            if help_text is None:
                 print(f'Sorry, no usage text found for "{arg}"')
             else:
-                print(getattr(module, help_text))
+                print(help_text)
 
     def install(self, *args):
         if not args or args[0] == '--global':
@@ -306,6 +343,11 @@ class CommandParser:
         installer.uninstall()
 
     def ls_files(self, *args):
+        # only load the .NET runtime and xltrail-core for the command that actually reads workbooks
+        import clr
+        clr.AddReference('xltrail-core')
+        from xltrail.core import Workbook
+
         def _ls_files(pattern):
             files = []
             for dirpath, dirnames, filenames in os.walk('.'):
@@ -4,124 +4,184 @@ from io import StringIO
 from unittest import TestCase, mock
 
 
+def open_missing_file(path, mode='r', **kwargs):
+    # side effect for mocked `open`: files can be created but do not exist yet
+    if 'r' in mode:
+        raise FileNotFoundError(path)
+    return mock.DEFAULT
+
+
 class TestLocalInstaller(TestCase):
 
-    @mock.patch('cli.is_git_repository', return_value=True)
-    def test_paths(self, mock_is_git_repository):
+    @mock.patch('cli.get_git_repository', return_value=cli.GitRepository(True, '\\path\\to\\repository'))
+    def test_paths(self, mock_get_git_repository):
         installer = cli.Installer(mode='local', path='\\path\\to\\repository')
         self.assertEqual(installer.get_git_attributes_path(), '\\path\\to\\repository\\.gitattributes')
         self.assertEqual(installer.get_git_attributes_path(), '\\path\\to\\repository\\.gitattributes')
 
+    @mock.patch('cli.get_git_repository', return_value=cli.GitRepository(True, '\\path\\to\\repository'))
+    def test_paths_from_subdirectory(self, mock_get_git_repository):
+        installer = cli.Installer(mode='local', path='\\path\\to\\repository\\sub')
+        mock_get_git_repository.assert_called_once_with('\\path\\to\\repository\\sub')
+        self.assertEqual(installer.git_attributes_path, '\\path\\to\\repository\\.gitattributes')
+        self.assertEqual(installer.git_ignore_path, '\\path\\to\\repository\\.gitignore')
+
     @mock.patch('cli.subprocess.run')
     @mock.patch('cli.is_frozen', return_value=True)
-    @mock.patch('cli.is_git_repository', return_value=True)
-    @mock.patch('cli.os.path.exists', return_value=False)
+    @mock.patch('cli.get_git_repository', return_value=cli.GitRepository(True, '\\path\\to\\repository'))
     @mock.patch('builtins.open', new_callable=mock.mock_open)
-    def test_can_install_when_files_do_not_exist(self, mock_file_open, mock_path_exists, \
-        mock_is_git_repository, mock_is_frozen, mock_run):
+    def test_can_install_when_files_do_not_exist(self, mock_file_open, \
+        mock_get_git_repository, mock_is_frozen, mock_run):
+        mock_file_open.side_effect = open_missing_file
         installer = cli.Installer(mode='local', path='\\path\\to\\repository')
         installer.install()
         mock_run.assert_has_calls([
-            mock.call(['git', 'config', 'diff.xl.command', 'git-xl-diff.exe'], cwd='\\path\\to\\repository', stderr=-1, stdout=-1, universal_newlines=True),
-            mock.call(['git', 'config', 'merge.xl.name', 'xl merge driver for Excel workbooks'], cwd='\\path\\to\\repository', stderr=-1, stdout=-1, universal_newlines=True),
-            mock.call(['git', 'config', 'merge.xl.driver', 'git-xl-merge.exe %P %O %A %B'], cwd='\\path\\to\\repository', stderr=-1, stdout=-1, universal_newlines=True)
+            mock.call(['git', 'config', 'diff.xl.command', 'git-xl-diff.exe'], cwd='\\path\\to\\repository', stderr=-3, stdout=-3),
+            mock.call(['git', 'config', 'merge.xl.name', 'xl merge driver for Excel workbooks'], cwd='\\path\\to\\repository', stderr=-3, stdout=-3),
+            mock.call(['git', 'config', 'merge.xl.driver', 'git-xl-merge.exe %P %O %A %B'], cwd='\\path\\to\\repository', stderr=-3, stdout=-3)
         ])
         mock_file_open.assert_has_calls([
-            mock.call('\\path\\to\\repository\\.gitattributes', 'w'),
+            mock.call('\\path\\to\\repository\\.gitattributes', 'rb', buffering=131072),
+            mock.call('\\path\\to\\repository\\.gitattributes', 'wb', buffering=131072),
             mock.call().__enter__(),
-            mock.call().writelines('*.xla diff=xl\n*.xlam diff=xl\n*.xls diff=xl\n*.xlsb diff=xl\n*.xlsm diff=xl\n*.xlsx diff=xl\n*.xlt diff=xl\n*.xltm diff=xl\n*.xltx diff=xl'),
+            mock.call().write(b'*.xla diff=xl\n*.xlam diff=xl\n*.xls diff=xl\n*.xlsb diff=xl\n*.xlsm diff=xl\n*.xlsx diff=xl\n*.xlt diff=xl\n*.xltm diff=xl\n*.xltx diff=xl\n'),
             mock.call().__exit__(None, None, None),
-            mock.call('\\path\\to\\repository\\.gitattributes', 'w'),
+            mock.call('\\path\\to\\repository\\.gitattributes', 'rb', buffering=131072),
+            mock.call('\\path\\to\\repository\\.gitattributes', 'wb', buffering=131072),
             mock.call().__enter__(),
-            mock.call().writelines('*.xla merge=xl\n*.xlam merge=xl\n*.xls merge=xl\n*.xlsb merge=xl\n*.xlsm merge=xl\n*.xlsx merge=xl\n*.xlt merge=xl\n*.xltm merge=xl\n*.xltx merge=xl'),
+            mock.call().write(b'*.xla merge=xl\n*.xlam merge=xl\n*.xls merge=xl\n*.xlsb merge=xl\n*.xlsm merge=xl\n*.xlsx merge=xl\n*.xlt merge=xl\n*.xltm merge=xl\n*.xltx merge=xl\n'),
             mock.call().__exit__(None, None, None),
-            mock.call('\\path\\to\\repository\\.gitignore', 'w'),
+            mock.call('\\path\\to\\repository\\.gitignore', 'rb', buffering=131072),
+            mock.call('\\path\\to\\repository\\.gitignore', 'wb', buffering=131072),
             mock.call().__enter__(),
-            mock.call().writelines('~$*.xla\n~$*.xlam\n~$*.xls\n~$*.xlsb\n~$*.xlsm\n~$*.xlsx\n~$*.xlt\n~$*.xltm\n~$*.xltx'),
+            mock.call().write(b'~$*.xla\n~$*.xlam\n~$*.xls\n~$*.xlsb\n~$*.xlsm\n~$*.xlsx\n~$*.xlt\n~$*.xltm\n~$*.xltx\n'),
             mock.call().__exit__(None, None, None)
         ])
 
     @mock.patch('cli.subprocess.run')
     @mock.patch('cli.is_frozen', return_value=True)
-    @mock.patch('cli.is_git_repository', return_value=True)
-    @mock.patch('cli.os.path.exists', return_value=True)
-    @mock.patch('builtins.open', new_callable=mock.mock_open, read_data='something\n')
-    def test_can_install_when_files_exist(self, mock_file_open, mock_path_exists, \
-        mock_is_git_repository, mock_is_frozen, mock_run):
+    @mock.patch('cli.get_git_repository', return_value=cli.GitRepository(True, '\\path\\to\\repository'))
+    @mock.patch('builtins.open', new_callable=mock.mock_open, read_data=b'something\n')
+    def test_can_install_when_files_exist(self, mock_file_open, \
+        mock_get_git_repository, mock_is_frozen, mock_run):
         installer = cli.Installer(mode='local', path='\\path\\to\\repository')
         installer.install()
         mock_run.assert_has_calls([
-            mock.call(['git', 'config', 'diff.xl.command', 'git-xl-diff.exe'], cwd='\\path\\to\\repository', stderr=-1, stdout=-1, universal_newlines=True),
-            mock.call(['git', 'config', 'merge.xl.name', 'xl merge driver for Excel workbooks'], cwd='\\path\\to\\repository', stderr=-1, stdout=-1, universal_newlines=True),
-            mock.call(['git', 'config', 'merge.xl.driver', 'git-xl-merge.exe %P %O %A %B'], cwd='\\path\\to\\repository', stderr=-1, stdout=-1, universal_newlines=True)
+            mock.call(['git', 'config', 'diff.xl.command', 'git-xl-diff.exe'], cwd='\\path\\to\\repository', stderr=-3, stdout=-3),
+            mock.call(['git', 'config', 'merge.xl.name', 'xl merge driver for Excel workbooks'], cwd='\\path\\to\\repository', stderr=-3, stdout=-3),
+            mock.call(['git', 'config', 'merge.xl.driver', 'git-xl-merge.exe %P %O %A %B'], cwd='\\path\\to\\repository', stderr=-3, stdout=-3)
         ])
         mock_file_open.assert_has_calls([
-            mock.call('\\path\\to\\repository\\.gitattributes', 'r'),
+            mock.call('\\path\\to\\repository\\.gitattributes', 'rb', buffering=131072),
             mock.call().__enter__(),
             mock.call().read(),
             mock.call().__exit__(None, None, None),
-            mock.call('\\path\\to\\repository\\.gitattributes', 'w'),
+            mock.call('\\path\\to\\repository\\.gitattributes', 'wb', buffering=131072),
             mock.call().__enter__(),
-            mock.call().writelines('*.xla diff=xl\n*.xlam diff=xl\n*.xls diff=xl\n*.xlsb diff=xl\n*.xlsm diff=xl\n*.xlsx diff=xl\n*.xlt diff=xl\n*.xltm diff=xl\n*.xltx diff=xl\nsomething'),
+            mock.call().write(b'*.xla diff=xl\n*.xlam diff=xl\n*.xls diff=xl\n*.xlsb diff=xl\n*.xlsm diff=xl\n*.xlsx diff=xl\n*.xlt diff=xl\n*.xltm diff=xl\n*.xltx diff=xl\nsomething\n'),
             mock.call().__exit__(None, None, None),
-            mock.call('\\path\\to\\repository\\.gitattributes', 'r'),
+            mock.call('\\path\\to\\repository\\.gitattributes', 'rb', buffering=131072),
             mock.call().__enter__(),
             mock.call().read(),
             mock.call().__exit__(None, None, None),
-            mock.call('\\path\\to\\repository\\.gitattributes', 'w'),
+            mock.call('\\path\\to\\repository\\.gitattributes', 'wb', buffering=131072),
             mock.call().__enter__(),
-            mock.call().writelines('*.xla merge=xl\n*.xlam merge=xl\n*.xls merge=xl\n*.xlsb merge=xl\n*.xlsm merge=xl\n*.xlsx merge=xl\n*.xlt merge=xl\n*.xltm merge=xl\n*.xltx merge=xl\nsomething'),
+            mock.call().write(b'*.xla merge=xl\n*.xlam merge=xl\n*.xls merge=xl\n*.xlsb merge=xl\n*.xlsm merge=xl\n*.xlsx merge=xl\n*.xlt merge=xl\n*.xltm merge=xl\n*.xltx merge=xl\nsomething\n'),
             mock.call().__exit__(None, None, None),
-            mock.call('\\path\\to\\repository\\.gitignore', 'r'),
+            mock.call('\\path\\to\\repository\\.gitignore', 'rb', buffering=131072),
             mock.call().__enter__(),
             mock.call().read(),
             mock.call().__exit__(None, None, None),
-            mock.call('\\path\\to\\repository\\.gitignore', 'w'),
+            mock.call('\\path\\to\\repository\\.gitignore', 'wb', buffering=131072),
             mock.call().__enter__(),
-            mock.call().writelines('something\n~$*.xla\n~$*.xlam\n~$*.xls\n~$*.xlsb\n~$*.xlsm\n~$*.xlsx\n~$*.xlt\n~$*.xltm\n~$*.xltx'),
+            mock.call().write(b'something\n~$*.xla\n~$*.xlam\n~$*.xls\n~$*.xlsb\n~$*.xlsm\n~$*.xlsx\n~$*.xlt\n~$*.xltm\n~$*.xltx\n'),
             mock.call().__exit__(None, None, None)
         ])
 
+    @mock.patch('cli.get_git_repository', return_value=cli.GitRepository(True, '\\path\\to\\repository'))
+    @mock.patch('builtins.open', new_callable=mock.mock_open,
+                read_data=b'caf\xe9\r\n# note\xe2\x80\xa8more\n*.log\x0cfoo\n')
+    def test_update_keeps_non_utf8_content(self, mock_file_open, mock_get_git_repository):
+        installer = cli.Installer(mode='local', path='\\path\\to\\repository')
+        installer.update_git_file(path=installer.git_ignore_path, keys=cli.GIT_IGNORE, operation='SET')
+        mock_file_open().write.assert_called_once_with(
+            b'# note\xe2\x80\xa8more\n*.log\x0cfoo\ncaf\xe9\n'
+            b'~$*.xla\n~$*.xlam\n~$*.xls\n~$*.xlsb\n~$*.xlsm\n~$*.xlsx\n~$*.xlt\n~$*.xltm\n~$*.xltx\n')
+
     @mock.patch('cli.subprocess.run')
-    @mock.patch('cli.is_git_repository', return_value=True)
-    @mock.patch('cli.os.path.exists', return_value=False)
+    @mock.patch('cli.get_git_repository', return_value=cli.GitRepository(True, '\\path\\to\\repository'))
     @mock.patch('cli.os.remove')
     @mock.patch('builtins.open', new_callable=mock.mock_open)
-    def test_can_uninstall_when_files_do_not_exist(self, mock_file_open, mock_os_remove,  mock_path_exists, mock_is_git_repository, mock_run):
+    def test_can_uninstall_when_files_do_not_exist(self, mock_file_open, mock_os_remove,  mock_get_git_repository, mock_run):
+        mock_file_open.side_effect = open_missing_file
+        mock_os_remove.side_effect = FileNotFoundError
+        mock_run.return_value.returncode = 0
         installer = cli.Installer(mode='local', path='\\path\\to\\repository')
         installer.uninstall()
-        mock_run.assert_called_once_with(['git', 'config', '--list'], cwd='\\path\\to\\repository', stderr=-1, stdout=-1, universal_newlines=True)
-        mock_os_remove.assert_has_calls([])
+        self.assertEqual(mock_run.call_count, 2)
+        mock_run.assert_has_calls([
+            mock.call(['git', 'config', '--remove-section', 'diff.xl'], cwd='\\path\\to\\repository', stderr=-3, stdout=-3),
+            mock.call(['git', 'config', '--remove-section', 'merge.xl'], cwd='\\path\\to\\repository', stderr=-3, stdout=-3)
+        ])
+        mock_os_remove.assert_has_calls([
+            mock.call('\\path\\to\\repository\\.gitattributes'),
+            mock.call('\\path\\to\\repository\\.gitignore')
+        ])
+        self.assertNotIn(mock.call().write(mock.ANY), mock_file_open.mock_calls)
 
 
     @mock.patch('cli.subprocess.run')
-    @mock.patch('cli.is_git_repository', return_value=True)
-    @mock.patch('cli.os.path.exists', return_value=True)
+    @mock.patch('cli.get_git_repository', return_value=cli.GitRepository(True, '\\path\\to\\repository'))
     @mock.patch('cli.os.remove')
-    @mock.patch('builtins.open', new_callable=mock.mock_open, read_data='something')
-    def test_can_uninstall_when_files_exist(self, mock_file_open, mock_os_remove,  mock_path_exists, mock_is_git_repository, mock_run):
+    @mock.patch('builtins.open', new_callable=mock.mock_open, read_data=b'something')
+    def test_can_uninstall_when_files_exist(self, mock_file_open, mock_os_remove,  mock_get_git_repository, mock_run):
+        mock_run.return_value.returncode = 0
         installer = cli.Installer(mode='local', path='\\path\\to\\repository')
         installer.uninstall()
-        mock_run.assert_called_once_with(['git', 'config', '--list'], cwd='\\path\\to\\repository', stderr=-1, stdout=-1, universal_newlines=True)
+        self.assertEqual(mock_run.call_count, 2)
+        mock_run.assert_has_calls([
+            mock.call(['git', 'config', '--remove-section', 'diff.xl'], cwd='\\path\\to\\repository', stderr=-3, stdout=-3),
+            mock.call(['git', 'config', '--remove-section', 'merge.xl'], cwd='\\path\\to\\repository', stderr=-3, stdout=-3)
+        ])
         self.assertEqual(mock_os_remove.call_count, 0)
+        # files hold no git-xl keys, so they are read but never rewritten
         mock_file_open.assert_has_calls([
-            mock.call('\\path\\to\\repository\\.gitattributes', 'r'),
+            mock.call('\\path\\to\\repository\\.gitattributes', 'rb', buffering=131072),
             mock.call().__enter__(),
             mock.call().read(),
             mock.call().__exit__(None, None, None),
-            mock.call('\\path\\to\\repository\\.gitattributes', 'w'),
-            mock.call().__enter__(),
-            mock.call().writelines('something'),
-            mock.call().__exit__(None, None, None),
-            mock.call('\\path\\to\\repository\\.gitattributes', 'r'),
+            mock.call('\\path\\to\\repository\\.gitattributes', 'rb', buffering=131072),
             mock.call().__enter__(),
             mock.call().read(),
             mock.call().__exit__(None, None, None),
-            mock.call('\\path\\to\\repository\\.gitattributes', 'w'),
+            mock.call('\\path\\to\\repository\\.gitignore', 'rb', buffering=131072),
             mock.call().__enter__(),
-            mock.call().writelines('something'),
+            mock.call().read(),
             mock.call().__exit__(None, None, None)
         ])
+        self.assertNotIn(mock.call().write(mock.ANY), mock_file_open.mock_calls)
+
+    @mock.patch('cli.subprocess.run')
+    @mock.patch('cli.get_git_repository', return_value=cli.GitRepository(True, '\\path\\to\\repository'))
+    @mock.patch('builtins.open', new_callable=mock.mock_open)
+    def test_uninstall_fails_when_gitconfig_is_locked(self, mock_file_open, mock_get_git_repository, mock_run):
+        mock_run.return_value.returncode = 255
+        installer = cli.Installer(mode='local', path='\\path\\to\\repository')
+        with self.assertRaises(RuntimeError):
+            installer.uninstall()
+        mock_file_open.assert_not_called()
+
+    @mock.patch('cli.subprocess.run')
+    @mock.patch('cli.is_frozen', return_value=True)
+    @mock.patch('cli.get_git_repository', return_value=cli.GitRepository(True, '\\path\\to\\repository'))
+    @mock.patch('builtins.open', new_callable=mock.mock_open,
+                read_data='\n'.join(sorted(cli.GIT_ATTRIBUTES_DIFFER | cli.GIT_ATTRIBUTES_MERGER | cli.GIT_IGNORE)).encode())
+    def test_install_does_not_rewrite_unchanged_files(self, mock_file_open, \
+        mock_get_git_repository, mock_is_frozen, mock_run):
+        installer = cli.Installer(mode='local', path='\\path\\to\\repository')
+        installer.install()
+        self.assertEqual(mock_file_open.call_count, 3)
+        self.assertNotIn(mock.call().write(mock.ANY), mock_file_open.mock_calls)
 
 
 class TestGlobalInstaller(TestCase):
@@ -130,23 +190,74 @@ class TestGlobalInstaller(TestCase):
     @mock.patch('cli.Installer.get_git_attributes_path')
     @mock.patch('cli.Installer.get_git_ignore_path')
     def test_global_gitconfig_dir(self, mock_get_git_ignore_path, mock_get_git_attributes_path, mock_run):
+        mock_completed_process = mock.Mock()
+        mock_completed_process.configure_mock(**{'stdout': b'file:C:/Users/xl/.gitconfig\x00user.name\nxl\x00'})
+        mock_run.return_value = mock_completed_process
         installer = cli.Installer(mode='global')
-        self.assertEqual(mock_run.call_count, 2)
-        mock_run.assert_has_calls([
-            mock.call(['git', 'config', '--global', '--list', '--show-origin'], cwd=None, stderr=-1, stdout=-1, universal_newlines=True),
-            mock.call(['git', 'config', '--global', '--list'], cwd=None, stderr=-1, stdout=-1, universal_newlines=True)
-        ])
+        self.assertEqual(installer.git_global_config_dir, 'C:/Users/xl')
+        mock_run.assert_called_once_with(['git', 'config', '--global', '--list', '--show-origin', '-z'], cwd=None, stderr=-3, stdout=-1)
+
+    @mock.patch('cli.subprocess.run')
+    @mock.patch('cli.os.path.expanduser', return_value='C:/Users/xl')
+    @mock.patch('cli.Installer.get_git_attributes_path')
+    @mock.patch('cli.Installer.get_git_ignore_path')
+    def test_global_gitconfig_dir_without_gitconfig(self, mock_get_git_ignore_path, mock_get_git_attributes_path,
+                                                    mock_expanduser, mock_run):
+        mock_completed_process = mock.Mock()
+        mock_completed_process.configure_mock(**{'stdout': b''})
+        mock_run.return_value = mock_completed_process
+        installer = cli.Installer(mode='global')
+        self.assertEqual(installer.git_global_config_dir, 'C:/Users/xl')
+        mock_expanduser.assert_called_once_with('~')
 
     @mock.patch('cli.subprocess.run')
     @mock.patch('cli.Installer.get_global_gitconfig_dir')
     @mock.patch('cli.Installer.get_git_ignore_path')
     def test_global_gitattributes_path(self, mock_get_git_ignore_path, get_global_gitconfig_dir, mock_run):
         mock_completed_process = mock.Mock()
-        mock_completed_process.configure_mock(**{'stdout': '.gitconfig'})
+        mock_completed_process.configure_mock(**{'stdout': b'file:C:/Users/xl/.gitconfig\x00core.attributesfile\nC:/xl/.gitattributes\x00'})
+        mock_run.return_value = mock_completed_process
+        installer = cli.Installer(mode='global')
+        self.assertEqual(installer.git_attributes_path, 'C:/xl/.gitattributes')
+        mock_run.assert_called_once_with(['git', 'config', '--global', '--list', '--show-origin', '-z'], cwd=None, stderr=-3, stdout=-1)
+
+    @mock.patch('cli.subprocess.run')
+    def test_global_config_is_read_once(self, mock_run):
+        mock_completed_process = mock.Mock()
+        mock_completed_process.configure_mock(**{'stdout': b'file:C:/Users/xl/.gitconfig\x00core.excludesfile\nC:/xl/.gitignore\x00'})
         mock_run.return_value = mock_completed_process
         installer = cli.Installer(mode='global')
         self.assertEqual(mock_run.call_count, 1)
-        mock_run.assert_called_once_with(['git', 'config', '--global', '--get', 'core.attributesfile'], cwd=None, stderr=-1, stdout=-1, universal_newlines=True)
+        self.assertEqual(installer.git_attributes_path, cli.os.path.join('C:/Users/xl', '.gitattributes'))
+        self.assertEqual(installer.git_ignore_path, 'C:/xl/.gitignore')
+
+
+class TestGitRepository(TestCase):
+
+    @mock.patch('cli.subprocess.run')
+    def test_inside_repository(self, mock_run):
+        mock_completed_process = mock.Mock()
+        mock_completed_process.configure_mock(**{'returncode': 0, 'stdout': b'true\nC:/repository\n'})
+        mock_run.return_value = mock_completed_process
+        repository = cli.get_git_repository('C:/repository/sub')
+        self.assertTrue(repository.is_repo)
+        self.assertEqual(repository.toplevel, cli.os.path.normpath('C:/repository'))
+        mock_run.assert_called_once_with(['git', 'rev-parse', '--is-inside-work-tree', '--show-toplevel'], cwd='C:/repository/sub', stderr=-3, stdout=-1)
+
+    @mock.patch('cli.subprocess.run')
+    def test_non_ascii_toplevel(self, mock_run):
+        mock_completed_process = mock.Mock()
+        mock_completed_process.configure_mock(**{'returncode': 0, 'stdout': 'true\nC:/Users/José/repository\n'.encode('utf-8')})
+        mock_run.return_value = mock_completed_process
+        repository = cli.get_git_repository('C:/Users/José/repository')
+        self.assertEqual(repository.toplevel, cli.os.path.normpath('C:/Users/José/repository'))
+
+    @mock.patch('cli.subprocess.run')
+    def test_outside_repository(self, mock_run):
+        mock_completed_process = mock.Mock()
+        mock_completed_process.configure_mock(**{'returncode': 128, 'stdout': b''})
+        mock_run.return_value = mock_completed_process
+        self.assertEqual(cli.get_git_repository('C:/somewhere'), cli.GitRepository(False, None))
 
 
 class TestHelp(TestCase):
@@ -169,6 +280,12 @@ class TestHelp(TestCase):
         command_parser.execute()
         self.assertEqual(mock_stdout.getvalue(), cli.HELP_UNINSTALL + '\n')
 
+    @mock.patch('sys.stdout', new_callable=StringIO)
+    def test_help_unknown_command(self, mock_stdout):
+        command_parser = cli.CommandParser(['help', 'foo'])
+        command_parser.execute()
+        self.assertEqual(mock_stdout.getvalue(), 'Sorry, no usage text found for "foo"\n')
+
 
 class CommandParser(TestCase):
 
@@ -184,3 +301,20 @@ class CommandParser(TestCase):
         command_parser.execute()
         self.assertTrue(mock_stdout.getvalue())
 
+    @mock.patch('sys.stdout', new_callable=StringIO)
+    @mock.patch('cli.get_git_repository', return_value=cli.GitRepository(False, None))
+    def test_env_outside_repository(self, mock_get_git_repository, mock_stdout):
+        command_parser = cli.CommandParser(['env'])
+        command_parser.execute()
+        mock_get_git_repository.assert_called_once()
+        self.assertEqual(mock_stdout.getvalue(), cli.GIT_XL_VERSION + '\n\nLocalWorkingDir=\nLocalGitIgnore=\nLocalGitAttributes=\n\n')
+
+    @mock.patch('sys.stdout', new_callable=StringIO)
+    @mock.patch('cli.get_git_repository', return_value=cli.GitRepository(True, '\\path\\to\\repository'))
+    def test_env_inside_repository(self, mock_get_git_repository, mock_stdout):
+        command_parser = cli.CommandParser(['env'])
+        command_parser.execute()
+        mock_get_git_repository.assert_called_once()
+        self.assertEqual(mock_stdout.getvalue(), cli.GIT_XL_VERSION + '\n\nLocalWorkingDir=\\path\\to\\repository\n'
+                         'LocalGitIgnore=\\path\\to\\repository\\.gitignore\n'
+                         'LocalGitAttributes=\\path\\to\\repository\\.gitattributes\n\n')